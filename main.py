@@ -1,11 +1,21 @@
 # main.py
 import os
+import re
 import time
+import threading
 import json
+import math
 import hashlib
+import functools
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass
+from typing import Optional
 import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlencode
+import soupsieve as sv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from bs4 import BeautifulSoup, SoupStrainer
+from urllib.parse import urljoin, urlencode, urlparse, parse_qs
 from dotenv import load_dotenv
 
 # ---- Configuration (voir plus bas comment configurer sur Replit Secrets) ----
@@ -16,6 +26,13 @@ TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")      # obligatoire
 
 CHECK_INTERVAL = int(os.getenv("CHECK_INTERVAL", "3600"))  # en secondes (ex : 3600 = 1h)
 MIN_SLEEP = 60  # sécurité minimale entre requêtes
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "6"))  # téléchargements Indeed simultanés
+FETCH_RATE = float(os.getenv("FETCH_RATE", "0.5"))    # requêtes Indeed max par seconde (politesse : ~1 toutes les 2 s, comme avant)
+if not FETCH_RATE > 0:  # (rejette aussi NaN) : un débit nul ferait diviser par zéro dans RateLimiter
+    raise ValueError(f"FETCH_RATE doit être strictement positif (reçu : {FETCH_RATE})")
+MAX_PAGE_BYTES = int(os.getenv("MAX_PAGE_BYTES", "1000000"))  # lecture max par page Indeed (octets)
+TELEGRAM_BATCH_SIZE = 5    # annonces regroupées par message Telegram
+TELEGRAM_MAX_LEN = 4096    # limite Telegram par message (caractères)
 
 # Paramètres de recherche (modifiables)
 TITLES = [
@@ -28,119 +45,294 @@ TITLES = [
 ]
 BRETAGNE_CITIES = ["Rennes", "Nantes", "Brest", "Saint-Brieuc", "Vannes", "Lorient", "Quimper", "Brest"]  # Nantes incluse
 CONTRACT_KEYWORDS = ["CDI", "CDD", "Intérim", "Interim", "Contrat"]
+# dédoublonnage (ordre conservé) : chaque doublon coûterait une requête Indeed par passe
+TITLES = list(dict.fromkeys(TITLES))
+BRETAGNE_CITIES = list(dict.fromkeys(BRETAGNE_CITIES))
+# regex compilées une fois : un seul passage sur le texte au lieu d'un `in` par mot-clé
+CITY_RE = re.compile("|".join(re.escape(c) for c in BRETAGNE_CITIES), re.IGNORECASE)
+# un groupe nommé par mot-clé (k0, k1... dans l'ordre de CONTRACT_KEYWORDS) : m.lastgroup donne le mot-clé
+# sans repasser par le texte trouvé (l'IGNORECASE accepte p.ex. "İ" turc, dont .upper() ne redonne pas "I")
+CONTRACT_RE = re.compile(r"\b(?:" + "|".join(f"(?P<k{i}>{re.escape(kw)})" for i, kw in enumerate(CONTRACT_KEYWORDS)) + r")\b", re.IGNORECASE)
+CONTRACT_TYPE_RE = re.compile(r"\b(?:cdi|cdd|intérim|interim)\b", re.IGNORECASE)
+CONTRACT_BY_UPPER = {kw.upper(): kw for kw in CONTRACT_KEYWORDS}
+REMOTE_MARKERS = ("télétravail", "teletravail", "remote")
 
-SEEN_FILE = "seen.json"
+SEEN_FILE = "seen.ndjson"  # journal append-only : un id JSON par ligne
+LEGACY_SEEN_FILE = "seen.json"  # ancien format (liste JSON), migré au démarrage
+SEEN_MAX_BYTES = 5_000_000  # au-delà, le journal est compacté...
+SEEN_KEEP_IDS = 50_000      # ...en ne gardant que les ids les plus récents
+SEEN_CAPACITY = 1_000_000
+SEEN_ERROR_RATE = 0.001  # faux positifs tolérés : une annonce ratée de temps en temps
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; JobNotifier/1.0; +https://example.com)"
 }
 
+# Session partagée : connexions keep-alive réutilisées vers fr.indeed.com et api.telegram.org
+SESSION = requests.Session()
+SESSION.headers.update(HEADERS)
+_adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+SESSION.mount("http://", _adapter)
+SESSION.mount("https://", _adapter)
+# Telegram : pool dédié pour les rafales d'envois + retries sur erreurs de connexion / 429.
+# Pas de retry en lecture (read=0) : le message a pu partir, on éviterait un doublon.
+SESSION.mount("https://api.telegram.org", HTTPAdapter(
+    pool_connections=2,
+    pool_maxsize=10,
+    max_retries=Retry(total=3, read=0, backoff_factor=0.5, status_forcelist=(429,), allowed_methods=frozenset({"POST"})),
+))
+
 # ------------------------------------------------------------------------------
 
+class RateLimiter:
+    """Token bucket thread-safe : au plus `rate` requêtes/s, rafales jusqu'à `burst`."""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.last) * self.rate)
+                self.last = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+INDEED_LIMITER = RateLimiter(FETCH_RATE)  # burst=1 : pas de rafale en début de passe
+
+# Ne construit que les cartes d'offres (pas la nav, le footer, les scripts...).
+# Regex sur la classe : l'attribut brut peut contenir plusieurs classes ("tapItem fs-unmask ...").
+CARDS_STRAINER = SoupStrainer(
+    ["a", "article", "div"],
+    attrs={"class": re.compile(r"(?:^|\s)(?:tapItem|job_seen_beacon|jobsearch-SerpJobCard)(?:\s|$)")},
+)
+
+# sélecteurs CSS compilés une fois (au lieu d'être re-parsés à chaque page)
+SEL_CARDS = sv.compile("a.tapItem")
+SEL_CARDS_ALT = sv.compile("div.job_seen_beacon a")
+SEL_CARDS_ARTICLE = sv.compile("article")
+
+# ------------------------------------------------------------------------------
+
+@dataclass(slots=True, frozen=True)
+class Job:
+    """Une annonce Indeed (slots : pas de __dict__ par instance)."""
+    title: str
+    company: str
+    location: str
+    summary: str
+    link: str
+    contract: Optional[str]
+    id: str
+
+class BloomFilter:
+    """Filtre de Bloom (bitmap de taille fixe) : `in` / `add` en O(k), sans stocker les ids."""
+
+    def __init__(self, capacity, error_rate):
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+
+    def __contains__(self, item):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, item):
+        flipped = False
+        for p in self._positions(item):
+            mask = 1 << (p & 7)
+            if not self.bits[p >> 3] & mask:
+                self.bits[p >> 3] |= mask
+                flipped = True
+        if flipped:  # id (probablement) nouveau : len() compte les ids distincts
+            self.count += 1
+
 def load_seen():
-    if not os.path.exists(SEEN_FILE):
-        return set()
-    try:
-        with open(SEEN_FILE, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        return set(data)
-    except Exception:
-        return set()
+    """Reconstruit le filtre en mémoire en lisant le journal ligne par ligne."""
+    seen = BloomFilter(SEEN_CAPACITY, SEEN_ERROR_RATE)
+    if os.path.exists(SEEN_FILE):
+        # une ligne abîmée (écriture interrompue...) est ignorée, pas tout le journal
+        with open(SEEN_FILE, "r", encoding="utf-8", errors="replace") as f:
+            for lineno, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    seen.add(json.loads(line))
+                except Exception as e:
+                    print(f"Ligne {lineno} ignorée dans {SEEN_FILE}:", e)
+    elif os.path.exists(LEGACY_SEEN_FILE):
+        try:
+            with open(LEGACY_SEEN_FILE, "r", encoding="utf-8") as f:
+                ids = json.load(f)
+        except Exception as e:
+            print(f"Lecture de {LEGACY_SEEN_FILE} impossible:", e)
+            ids = []
+        for job_id in ids:
+            seen.add(job_id)
+        save_new(ids)
+    return seen
 
-def save_seen(seen_set):
-    with open(SEEN_FILE, "w", encoding="utf-8") as f:
-        json.dump(list(seen_set), f, ensure_ascii=False, indent=2)
+def save_new(ids):
+    """Ajoute les nouveaux ids en fin de journal (pas de réécriture complète)."""
+    # si la dernière écriture a été coupée en pleine ligne, on repart sur une ligne neuve
+    needs_newline = False
+    if os.path.exists(SEEN_FILE) and os.path.getsize(SEEN_FILE) > 0:
+        with open(SEEN_FILE, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            needs_newline = f.read(1) != b"\n"
+    with open(SEEN_FILE, "a", encoding="utf-8") as f:
+        if needs_newline:
+            f.write("\n")
+        for job_id in ids:
+            f.write(json.dumps(job_id) + "\n")
+    if os.path.getsize(SEEN_FILE) > SEEN_MAX_BYTES:
+        compact_seen()
 
+def compact_seen():
+    """Réécrit le journal sans doublons en ne gardant que les SEEN_KEEP_IDS ids les plus récents."""
+    with open(SEEN_FILE, "r", encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    recent = list(dict.fromkeys(reversed(lines)))[:SEEN_KEEP_IDS]
+    tmp = SEEN_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.writelines(reversed(recent))
+    os.replace(tmp, SEEN_FILE)
+
+@functools.lru_cache(maxsize=512)
 def make_indeed_url(query, location="", start=0):
     base = "https://fr.indeed.com/jobs"
     params = {"q": query, "l": location, "start": start}
     return f"{base}?{urlencode(params)}"
 
 def get_job_id_from_link(link):
-    # Use the link string hashed if no id in URL
+    # Indeed job key (jk=...) when present, else the link string hashed
+    jk = parse_qs(urlparse(link).query).get("jk")
+    if jk and jk[0]:
+        return jk[0]
+    return hashlib.blake2b(link.encode("utf-8"), digest_size=16).hexdigest()
+
+def get_legacy_job_id(link):
+    # ancien id (SHA1 du lien), encore présent dans les historiques migrés depuis seen.json
     return hashlib.sha1(link.encode("utf-8")).hexdigest()
 
-def parse_indeed_search(query, location="", max_pages=2):
-    """Retourne une liste d'annonces : dicts avec title, company, location, summary, link, contract"""
-    results = []
-    for page in range(max_pages):
-        url = make_indeed_url(query, location, start=page*10)
-        try:
-            resp = requests.get(url, headers=HEADERS, timeout=15)
+def fetch_page(url):
+    """Télécharge une page Indeed (respecte INDEED_LIMITER). Retourne le HTML brut (bytes,
+    au plus MAX_PAGE_BYTES, décodé par le parser) ou None."""
+    INDEED_LIMITER.acquire()
+    try:
+        with SESSION.get(url, timeout=15, stream=True) as resp:
             if resp.status_code != 200:
-                break
-            soup = BeautifulSoup(resp.text, "html.parser")
-            # Indeed moderne : liens d'offres contiennent a.tapItem
-            cards = soup.select("a.tapItem") or soup.select("div.job_seen_beacon a")
-            if not cards:
-                # fallback: look for article tags
-                cards = soup.select("article")
-            if not cards:
-                break
-            for c in cards:
-                # title
-                title_tag = c.select_one("h2")
-                title = title_tag.get_text(strip=True) if title_tag else c.get_text(" ", strip=True)[:80]
-                # link
-                href = c.get("href") or (c.select_one("a") and c.select_one("a").get("href"))
-                if not href:
-                    continue
-                link = urljoin("https://fr.indeed.com", href)
-                # company & location & summary
-                company = ""
-                loc = ""
-                comp_tag = c.select_one(".companyName") or c.select_one(".company")
-                if comp_tag:
-                    company = comp_tag.get_text(strip=True)
-                loc_tag = c.select_one(".companyLocation") or c.select_one(".location")
-                if loc_tag:
-                    loc = loc_tag.get_text(strip=True)
-                summary = ""
-                summ_tag = c.select_one(".job-snippet") or c.select_one(".summary")
-                if summ_tag:
-                    summary = summ_tag.get_text(" ", strip=True)
-                # try to detect contract type in text
-                whole_text = " ".join([title, company, loc, summary]).upper()
-                contract = None
-                for kw in CONTRACT_KEYWORDS:
-                    if kw.upper() in whole_text:
-                        contract = kw
-                        break
-                results.append({
-                    "title": title,
-                    "company": company,
-                    "location": loc,
-                    "summary": summary,
-                    "link": link,
-                    "contract": contract,
-                    "id": get_job_id_from_link(link)
-                })
-            time.sleep(1)  # courte pause pour éviter spam
-        except Exception as e:
-            print("Erreur fetch Indeed:", e)
-            break
+                return None
+            return resp.raw.read(MAX_PAGE_BYTES, decode_content=True)
+    except Exception as e:
+        print("Erreur fetch Indeed:", e)
+        return None
+
+def fetch_and_parse(url):
+    """Télécharge et parse une page Indeed (appelé depuis un thread). Retourne la liste d'annonces ou None."""
+    html = fetch_page(url)
+    if html is None:
+        return None
+    try:
+        return parse_indeed_page(html)
+    except Exception as e:
+        print("Erreur parsing Indeed:", e)
+        return None
+
+def fetch_and_parse_all(urls):
+    """Télécharge et parse les pages en parallèle (FETCH_WORKERS threads). Retourne {url: annonces}."""
+    results = {}
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as ex:
+        futures = {ex.submit(fetch_and_parse, url): url for url in dict.fromkeys(urls)}
+        for fut in as_completed(futures):
+            jobs = fut.result()
+            if jobs is not None:
+                results[futures[fut]] = jobs
+    return results
+
+def parse_indeed_page(html):
+    """Extrait les annonces d'une page de résultats Indeed : objets Job"""
+    results = []
+    soup = BeautifulSoup(html, "lxml", parse_only=CARDS_STRAINER)
+    # Indeed moderne : liens d'offres contiennent a.tapItem
+    cards = SEL_CARDS.select(soup) or SEL_CARDS_ALT.select(soup)
+    if not cards:
+        # fallback: look for article tags (page complète, ancien format)
+        soup = BeautifulSoup(html, "lxml")
+        cards = SEL_CARDS_ARTICLE.select(soup)
+    for c in cards:
+        # title
+        title_tag = c.find("h2")
+        title = title_tag.get_text(strip=True) if title_tag else c.get_text(" ", strip=True)[:80]
+        # link
+        href = c.get("href")
+        if not href:
+            a_tag = c.find("a", href=True)
+            href = a_tag.get("href") if a_tag else None
+        if not href:
+            continue
+        link = urljoin("https://fr.indeed.com", href)
+        # company & location & summary
+        company = ""
+        loc = ""
+        comp_tag = c.find(class_=["companyName", "company"])
+        if comp_tag:
+            company = comp_tag.get_text(strip=True)
+        loc_tag = c.find(class_=["companyLocation", "location"])
+        if loc_tag:
+            loc = loc_tag.get_text(strip=True)
+        summary = ""
+        summ_tag = c.find(class_=["job-snippet", "summary"])
+        if summ_tag:
+            summary = summ_tag.get_text(" ", strip=True)
+        # try to detect contract type in text
+        # priorité = ordre de CONTRACT_KEYWORDS : CDI/CDD/Intérim avant "Contrat"
+        found = [int(m.lastgroup[1:]) for m in CONTRACT_RE.finditer(" ".join([title, company, loc, summary]))]
+        contract = CONTRACT_KEYWORDS[min(found)] if found else None
+        results.append(Job(
+            title=title,
+            company=company,
+            location=loc,
+            summary=summary,
+            link=link,
+            contract=contract,
+            id=get_job_id_from_link(link),
+        ))
     return results
 
 def filter_by_region_and_contract(jobs, region_cities, accept_contracts=True, accept_remote=False):
     filtered = []
+    city_re = CITY_RE if region_cities is BRETAGNE_CITIES else re.compile("|".join(re.escape(c) for c in region_cities), re.IGNORECASE)
     for j in jobs:
-        loc = (j.get("location") or "").lower()
-        text = (j.get("title","") + " " + j.get("summary","")).lower()
-        is_remote = "télétravail" in loc or "télétravail" in text or "teletravail" in text or "remote" in text
-        in_region = any(city.lower() in loc or city.lower() in text for city in region_cities)
-        if accept_remote and is_remote:
-            pass_ok = True
-        else:
-            pass_ok = in_region
-        if not pass_ok:
-            continue
+        haystack = (j.location + " " + j.title + " " + j.summary).casefold()
+        # région d'abord ; le test télétravail n'est fait que si nécessaire
+        if not city_re.search(haystack):
+            if not (accept_remote and any(m in haystack for m in REMOTE_MARKERS)):
+                continue
         if accept_contracts:
             # if job doesn't say contract type, still keep it (many offers omit it). But prefer those with accepted types.
-            if j.get("contract"):
-                if not any(kw.upper() in j["contract"].upper() for kw in CONTRACT_KEYWORDS):
-                    # not in accepted keywords -> still allow if summary includes keywords
-                    if not any(kw.lower() in (j.get("summary") or "").lower() for kw in ("cdi","cdd","intérim","interim")):
-                        continue
+            # contract is normally resolved from CONTRACT_KEYWORDS at parse time: a dict lookup is enough
+            if j.contract and j.contract.upper() not in CONTRACT_BY_UPPER:
+                # not in accepted keywords -> still allow if summary includes keywords
+                if not CONTRACT_TYPE_RE.search(j.summary):
+                    continue
             # otherwise keep
         filtered.append(j)
     return filtered
@@ -149,7 +341,7 @@ def send_telegram_message(token, chat_id, text):
     url = f"https://api.telegram.org/bot{token}/sendMessage"
     payload = {"chat_id": chat_id, "text": text, "disable_web_page_preview": False}
     try:
-        r = requests.post(url, data=payload, timeout=10)
+        r = SESSION.post(url, data=payload, timeout=10)
         return r.status_code == 200
     except Exception as e:
         print("Erreur Telegram:", e)
@@ -157,17 +349,34 @@ def send_telegram_message(token, chat_id, text):
 
 def format_job_message(job):
     lines = [
-        f"🔔 {job['title']}",
-        f"🏢 {job.get('company','')} — 📍 {job.get('location','')}",
+        f"🔔 {job.title}",
+        f"🏢 {job.company} — 📍 {job.location}",
     ]
-    if job.get("contract"):
-        lines.append(f"🧾 Contrat: {job.get('contract')}")
-    lines.append(job.get("link"))
-    if job.get("summary"):
+    if job.contract:
+        lines.append(f"🧾 Contrat: {job.contract}")
+    lines.append(job.link)
+    if job.summary:
         lines.append("")
-        lines.append(job.get("summary")[:400] + ("..." if len(job.get("summary",""))>400 else ""))
+        lines.append(job.summary[:400] + ("..." if len(job.summary)>400 else ""))
     return "\n".join(lines)
 
+def batch_job_messages(jobs, batch_size=TELEGRAM_BATCH_SIZE, max_len=TELEGRAM_MAX_LEN):
+    """Regroupe les annonces par messages d'au plus `batch_size` annonces et `max_len` caractères.
+    Retourne une liste de (texte, annonces du message)."""
+    sep = "\n\n---\n\n"
+    batches = []
+    text, batch = "", []
+    for j in jobs:
+        msg = format_job_message(j)[:max_len]
+        if batch and (len(batch) >= batch_size or len(text) + len(sep) + len(msg) > max_len):
+            batches.append((text, batch))
+            text, batch = "", []
+        text = text + sep + msg if batch else msg
+        batch.append(j)
+    if batch:
+        batches.append((text, batch))
+    return batches
+
 def main_loop():
     if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
         print("ERREUR: TELEGRAM_BOT_TOKEN et TELEGRAM_CHAT_ID doivent être définis en variables d'environnement.")
@@ -177,41 +386,49 @@ def main_loop():
     print(f"Démarrage — {len(seen)} annonces déjà en mémoire.")
     while True:
         all_new = []
+        migrated = []  # déjà vues sous leur ancien id SHA1 : on enregistre le nouvel id sans renvoyer
         # 1) recherches localisées en Bretagne (par villes)
-        for title in TITLES:
-            for city in BRETAGNE_CITIES:
-                query = title
-                jobs = parse_indeed_search(query, city, max_pages=1)
-                candidates = filter_by_region_and_contract(jobs, BRETAGNE_CITIES, accept_contracts=True, accept_remote=False)
-                for j in candidates:
-                    if j["id"] not in seen:
-                        all_new.append(j)
-                        seen.add(j["id"])
-                time.sleep(1)
+        searches = [(title, city, False) for title in TITLES for city in BRETAGNE_CITIES]
         # 2) recherches télétravail (100% remote) sur toute la France
-        for title in TITLES:
-            query_remote = f"{title} télétravail"
-            jobs = parse_indeed_search(query_remote, "France", max_pages=1)
-            candidates = filter_by_region_and_contract(jobs, BRETAGNE_CITIES, accept_contracts=True, accept_remote=True)
+        searches += [(f"{title} télétravail", "France", True) for title in TITLES]
+        searches = list(dict.fromkeys(searches))
+        # téléchargement + parsing en parallèle (1 page par recherche)
+        urls = [make_indeed_url(query, location) for query, location, _ in searches]
+        pages = fetch_and_parse_all(urls)
+        # dédoublonnage / mise à jour de `seen` uniquement ici, sur le thread principal
+        for (query, location, remote), url in zip(searches, urls):
+            jobs = pages.get(url)
+            if jobs is None:
+                continue
+            candidates = filter_by_region_and_contract(jobs, BRETAGNE_CITIES, accept_contracts=True, accept_remote=remote)
             for j in candidates:
                 # double-check remote in text/location
-                if "télétravail" in (j.get("location","") + " " + j.get("summary","")).lower() or "remote" in (j.get("location","") + " " + j.get("summary","")).lower():
-                    if j["id"] not in seen:
-                        all_new.append(j)
-                        seen.add(j["id"])
-            time.sleep(1)
+                if remote:
+                    loc_summary = (j.location + " " + j.summary).casefold()
+                    if not any(m in loc_summary for m in REMOTE_MARKERS):
+                        continue
+                if j.id in seen:
+                    continue
+                seen.add(j.id)
+                if get_legacy_job_id(j.link) in seen:
+                    migrated.append(j.id)
+                else:
+                    all_new.append(j)
 
         # Envoi notifications sur Telegram pour chaque nouvelle annonce
         if all_new:
             print(f"{len(all_new)} nouvelles annonces trouvées — envoi Telegram...")
-            for j in all_new:
-                msg = format_job_message(j)
+            for i, (msg, batch) in enumerate(batch_job_messages(all_new)):
+                if i:
+                    time.sleep(1)  # petite pause entre envois
                 success = send_telegram_message(TELEGRAM_BOT_TOKEN, TELEGRAM_CHAT_ID, msg)
-                print("Envoyé:", j["title"], "OK" if success else "FAILED")
-                time.sleep(1)  # petite pause entre envois
-            save_seen(seen)
+                for j in batch:
+                    print("Envoyé:", j.title, "OK" if success else "FAILED")
+            save_new([j.id for j in all_new])
         else:
             print("Aucune nouvelle annonce cette passe.")
+        if migrated:
+            save_new(migrated)
 
         # attente avant prochaine passe
         sleep_sec = max(MIN_SLEEP, CHECK_INTERVAL)